@@ -17,6 +17,7 @@
             pre, post: int, number of seconds to pad timespan by
 
     To use this *within* a job, e.g. to generate an URL inside an sbatch script, the 2nd form must be used (as `sacct` will not have job endtime), e.g.:
+    (if Slurm sets $SLURM_JOB_START_TIME the 1st form also works without `sacct`, but the range ends at the job's time limit)
     
     job.sh:
         startstamp="$(date)"
@@ -28,7 +29,29 @@
     Works on python 2.7 and 3.7.4 at least.
 """
 from __future__ import print_function
-import time, os, sys, subprocess
+import time, os, sys # subprocess and urllib are imported where needed, to keep `import dashboard` fast
+try:
+    from functools import lru_cache
+except ImportError: # python 2
+    from functools import wraps
+    def lru_cache(maxsize=128):
+        """ Minimal stand-in for python 3's `functools.lru_cache` - positional args only, and clears when full rather than evicting. """
+        def decorator(func):
+            cache = {}
+            @wraps(func)
+            def wrapper(*args):
+                if args not in cache:
+                    if maxsize is not None and len(cache) >= maxsize:
+                        cache.clear()
+                    cache[args] = func(*args)
+                return cache[args]
+            return wrapper
+        return decorator
+
+_DATE_FORMAT = '%a %b %d %H:%M:%S %Y' # default `date` output, with the timezone field removed
+_SACCT_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S' # `sacct` Start/End, in local time
+_SACCT_COLUMNS = ('NodeList', 'Start', 'End')
+_SACCT_CMD = ('sacct', '--parsable2', '--noheader', '--format', ','.join(_SACCT_COLUMNS)) # job ID options appended
 
 def job_info(job_id):
     """ Get info about a completed Slurm job.
@@ -38,31 +61,148 @@ def job_info(job_id):
         
         Returns a sequence:
             NodeList, Start, End
+
+        If called from within job `job_id` itself this is read from the job's environment instead of `sacct`,
+        in which case End is the job's time limit rather than its actual end.
+    """
+    env = os.environ
+    if env.get('SLURM_JOB_ID') == job_id:
+        try:
+            return [env['SLURM_JOB_NODELIST'], '@' + env['SLURM_JOB_START_TIME'], '@' + env['SLURM_JOB_END_TIME']]
+        except KeyError: # older Slurm versions don't set start/end times
+            pass
+    import subprocess
+    cmd = _SACCT_CMD + ('-j', job_id)
+    info = subprocess.check_output(cmd, universal_newlines=True).lstrip('\n')
+    head, _, _ = info.partition('\n') # subsequent lines are job steps
+    return head.split('|')
+
+def _parse_datestr(s, _int=int, _strptime=time.strptime, _mktime=time.mktime):
+    """ Convert a date string to seconds since epoch without calling `date`.
+
+        Handles default `date` output in UTC/GMT or the local timezone, e.g. "Wed Oct 30 11:55:13 GMT 2019",
+        `sacct` times, e.g. "2019-10-30T11:55:13", and whole seconds since epoch, e.g. "@1572436513".
+
+        Returns an int, or None if the format is not recognised.
+
+        Keyword args bind globals as locals for speed and should not be passed.
+    """
+    fields = s.split()
+    try:
+        if s.startswith('@'): # seconds since epoch
+            return _int(s[1:])
+        if len(fields) == 6:
+            zone = fields.pop(4)
+            t = _strptime(' '.join(fields), _DATE_FORMAT)
+            if zone in ('UTC', 'GMT'):
+                import calendar # slow to import, but already loaded by `time.strptime()` so this is just a lookup
+                return calendar.timegm(t)
+            if zone in time.tzname:
+                # let mktime decide DST (zones like Europe/Dublin have negative DST, so isdst can't be inferred
+                # from the name) and only accept the result if the local zone name agrees, otherwise use `date`
+                secs = _int(_mktime(t[:8] + (-1,)))
+                if time.strftime('%Z', time.localtime(secs)) == zone:
+                    return secs
+        elif len(fields) == 1:
+            return _int(_mktime(_strptime(s, _SACCT_DATE_FORMAT)))
+    except ValueError:
+        pass
+    return None
+
+_DATE_CMD = ('date', '-f', '-', '+%s%3N') # outputs ms since epoch
+_datestr_cache = {} # date str -> ns since epoch, for all conversions
+_DATESTR_CACHE_SIZE = 256
+
+def _cache_datestr(s, n):
+    """ Record a conversion in `_datestr_cache`, clearing it first if full. """
+    if len(_datestr_cache) >= _DATESTR_CACHE_SIZE:
+        _datestr_cache.clear()
+    _datestr_cache[s] = n
+
+def _start_datestrs(strs):
+    """ Start converting a sequence of date strings to ns since epoch.
+
+        Previously-converted and common formats are handled immediately, a `date -f -` process is started for the rest.
+
+        Returns a tuple (ns, pending, proc) to pass to `_finish_datestrs()`, where `ns` is a list with None
+        for each string in `pending` left to `proc`, and `proc` is a `subprocess.Popen` or None.
     """
-    COLUMNS = ('NodeList', 'Start' ,'End')
-    cmd = ('sacct', '-j', job_id, '--parsable', '--noheader', '--format', ','.join(COLUMNS))
-    info = subprocess.check_output(cmd, universal_newlines=True).strip('\n').split('\n')[0] # subsequent lines are job steps
-    info = info.split('|')[:-1] # slice removes empty element from trailing |
-    return info
+    ns = []
+    pending = []
+    for s in strs:
+        n = _datestr_cache.get(s)
+        if n is None:
+            secs = _parse_datestr(s)
+            if secs is None:
+                pending.append(s)
+            else:
+                n = secs * 1000
+                _cache_datestr(s, n)
+        ns.append(n)
+    if not pending:
+        return ns, pending, None
+    import subprocess
+    proc = subprocess.Popen(_DATE_CMD, stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True)
+    return ns, pending, proc
+
+def _finish_datestrs(ns, pending, proc):
+    """ Wait for conversions from `_start_datestrs()`.
+
+        Returns a list of ints, ns since epoch.
+    """
+    if proc is not None:
+        stdout, _ = proc.communicate('\n'.join(pending) + '\n') # input written here, as `date` can fill its stdout pipe
+        if proc.returncode:
+            import subprocess
+            raise subprocess.CalledProcessError(proc.returncode, _DATE_CMD)
+        converted = [int(n) for n in stdout.split()]
+        for s, n in zip(pending, converted):
+            _cache_datestr(s, n)
+        converted = iter(converted)
+        ns = [next(converted) if n is None else n for n in ns]
+    return ns
+
+def _abort_datestrs(ns, pending, proc):
+    """ Discard conversions from `_start_datestrs()`, killing and reaping any `date` process. """
+    if proc is not None:
+        proc.kill()
+        proc.communicate()
+
+def datestrs_to_ns(strs):
+    """ Convert a sequence of date strings from `date` to ns since epoch.
+
+        Common formats are parsed in python, the rest are converted by a single `date -f -` process.
+
+        Results are cached, so strings must be absolute timestamps (e.g. from `$(date)`) - relative strings
+        like "now" or "yesterday" will return the value from their first conversion.
+
+        Returns a list of ints.
+    """
+    return _finish_datestrs(*_start_datestrs(strs))
 
 def datestr_to_ns(s):
     """ Convert date string from `date` to ns since epoch.
     
-        Requires `date` taking `+%s` to be available.
+        Common formats are parsed in python, otherwise requires GNU `date` (for `-f` and `+%s%3N`) to be available.
+
+        Results are cached as for `datestrs_to_ns()`.
         
         Returns an int.
     """
     
-    seconds_since_epoch = int(subprocess.check_output(('date', '+%s', '-d', s), universal_newlines=True).strip())
-    return seconds_since_epoch * 1000
+    return datestrs_to_ns((s,))[0]
 
+@lru_cache(maxsize=64)
 def expand_hosts(hostlist):
-    """ Expand a slurm hostlist like "openhpc-compute-[12-13]" into a list of strs.
+    """ Expand a slurm hostlist like "openhpc-compute-[12-13]" into a tuple of strs.
     
         Requires `scontrol` to be available.
+
+        Results are cached for the life of the process, so changes to node definitions made while it runs are not seen.
     """
-    hostnames = subprocess.check_output(('scontrol', 'show', 'hostnames', hostlist), universal_newlines=True).strip('\n').split('\n')
-    return hostnames
+    import subprocess
+    hostnames = subprocess.check_output(('scontrol', 'show', 'hostnames', hostlist), universal_newlines=True).splitlines()
+    return tuple(hostnames)
 
 def get_dashboard_url(baseurl, start=None, end=None, hostlist=None, domain=None, pre=30, post=30):
     """ Get the grafana dashboard url for a given time range.
@@ -79,22 +219,30 @@ def get_dashboard_url(baseurl, start=None, end=None, hostlist=None, domain=None,
         Returns a str.
     """
     
-    url = []
+    try:
+        from urllib.parse import urlencode
+    except ImportError: # python 2
+        from urllib import urlencode
+    params = []
+    dates = _start_datestrs([d for d in (start, end) if d])
+    if hostlist:
+        try:
+            hostnames = expand_hosts(hostlist) # overlaps with start-up of any `date` process, input is sent after
+        except BaseException:
+            _abort_datestrs(*dates)
+            raise
+    dates_ns = iter(_finish_datestrs(*dates))
     if start:
-        start_ns = datestr_to_ns(start) - pre *1000
-        url.append('from=%s' % start_ns)
+        start_ns = next(dates_ns) - pre *1000
+        params.append(('from', '%d' % start_ns))
     if end:
-        end_ns = datestr_to_ns(end) + post * 1000
-        url.append('to=%s' % end_ns)
+        end_ns = next(dates_ns) + post * 1000
+        params.append(('to', '%d' % end_ns))
     if hostlist:
-        hostnames = expand_hosts(hostlist)
-        for host in hostnames:
-            hostparam = 'var-hostname=%s' % host
-            if domain:
-                hostparam += '.' + domain
-            url.append(hostparam)
-
-    return baseurl + '?' + '&'.join(url)
+        suffix = ('.' + domain) if domain else ''
+        params += [('var-hostname', host + suffix) for host in hostnames]
+
+    return baseurl + '?' + urlencode(params)
     
 if __name__ == '__main__':
     if len(sys.argv) < 3: